@@ -12,6 +12,7 @@ import math
 import sys
 import datetime
 import random
+from functools import lru_cache
 sys.path.append('../')
 
 from global_methods import *
@@ -27,7 +28,15 @@ from persona.cognitive_modules.reflect import *
 from persona.cognitive_modules.execute import *
 from persona.cognitive_modules.converse import *
 
-class Persona: 
+@lru_cache(maxsize=8)
+def _day_key(curr_time):
+  # Every persona is handed the same datetime instance for a given tick, so
+  # caching the formatted day string costs one strftime per tick instead of
+  # one (or two) per persona.
+  return curr_time.strftime('%a %b %d')
+
+
+class Persona:
   def __init__(self, name, folder_mem_saved=False):
     # PERSONA BASE STATE 
     # <name> is the full name of the persona. This is a unique identifier for
@@ -182,55 +191,99 @@ class Persona:
     reflect(self)
 
 
-  def move(self, maze, personas, curr_tile, curr_time):
+  def begin_move(self, curr_tile, curr_time):
     """
-    This is the main cognitive function where our main sequence is called. 
+    The first phase of a move: syncs the persona's scratch memory with the
+    world's current tile and time, and figures out whether the persona
+    started a new day.
 
-    INPUT: 
-      maze: The Maze class of the current world. 
-      personas: A dictionary that contains all persona names as keys, and the 
-                Persona instance as values. 
-      curr_tile: A tuple that designates the persona's current tile location 
+    INPUT:
+      curr_tile: A tuple that designates the persona's current tile location
                  in (row, col) form. e.g., (58, 39)
-      curr_time: datetime instance that indicates the game's current time. 
-    OUTPUT: 
-      execution: A triple set that contains the following components: 
-        <next_tile> is a x,y coordinate. e.g., (58, 9)
-        <pronunciatio> is an emoji.
-        <description> is a string description of the movement. e.g., 
-        writing her next novel (editing her novel) 
-        @ double studio:double studio:common room:sofa
+      curr_time: datetime instance that indicates the game's current time.
+    OUTPUT:
+      new_day: This can take one of the three values.
+        1) <Boolean> False -- It is not a "new day" cycle.
+        2) <String> "First day" -- It is literally the start of a simulation.
+        3) <String> "New day" -- It is a new day.
     """
-    # Updating persona's scratch memory with <curr_tile>. 
+    # Updating persona's scratch memory with <curr_tile>.
     self.scratch.curr_tile = curr_tile
 
     # We figure out whether the persona started a new day, and if it is a new
-    # day, whether it is the very first day of the simulation. This is 
+    # day, whether it is the very first day of the simulation. This is
     # important because we set up the persona's long term plan at the start of
-    # a new day. 
+    # a new day.
     new_day = False
-    if not self.scratch.curr_time: 
+    if not self.scratch.curr_time:
       new_day = "First day"
-    elif (self.scratch.curr_time.strftime('%a %b %d')
-          != curr_time.strftime('%a %b %d')):
+    elif _day_key(self.scratch.curr_time) != _day_key(curr_time):
       new_day = "New day"
     self.scratch.curr_time = curr_time
+    return new_day
 
-    # Main cognitive sequence begins here. 
-    perceived = self.perceive(maze)
+
+  def continue_move(self, maze, personas, new_day, perceived):
+    """
+    The second phase of a move: runs the cognitive sequence on an already
+    perceived world state. This is kept separate from <begin_move> and
+    <perceive> so that a server can perceive all personas concurrently and
+    then run this phase -- which may start conversations that touch other
+    personas -- one persona at a time.
+
+    INPUT:
+      maze: The Maze class of the current world.
+      personas: A dictionary that contains all persona names as keys, and the
+                Persona instance as values.
+      new_day: The new day marker returned by <begin_move>.
+      perceived: a list of <ConceptNode> returned by <perceive>.
+    OUTPUT:
+      execution: A triple set that contains the following components:
+        <next_tile> is a x,y coordinate. e.g., (58, 9)
+        <pronunciatio> is an emoji.
+        <description> is a string description of the movement. e.g.,
+        writing her next novel (editing her novel)
+        @ double studio:double studio:common room:sofa
+    """
     retrieved = self.retrieve(perceived)
     plan = self.plan(maze, personas, new_day, retrieved)
     self.reflect()
 
-    # <execution> is a triple set that contains the following components: 
+    # <execution> is a triple set that contains the following components:
     # <next_tile> is a x,y coordinate. e.g., (58, 9)
     # <pronunciatio> is an emoji. e.g., "\ud83d\udca4"
-    # <description> is a string description of the movement. e.g., 
-    #   writing her next novel (editing her novel) 
+    # <description> is a string description of the movement. e.g.,
+    #   writing her next novel (editing her novel)
     #   @ double studio:double studio:common room:sofa
     return self.execute(maze, personas, plan)
 
 
+  def move(self, maze, personas, curr_tile, curr_time):
+    """
+    This is the main cognitive function where our main sequence is called.
+
+    INPUT:
+      maze: The Maze class of the current world.
+      personas: A dictionary that contains all persona names as keys, and the
+                Persona instance as values.
+      curr_tile: A tuple that designates the persona's current tile location
+                 in (row, col) form. e.g., (58, 39)
+      curr_time: datetime instance that indicates the game's current time.
+    OUTPUT:
+      execution: A triple set that contains the following components:
+        <next_tile> is a x,y coordinate. e.g., (58, 9)
+        <pronunciatio> is an emoji.
+        <description> is a string description of the movement. e.g.,
+        writing her next novel (editing her novel)
+        @ double studio:double studio:common room:sofa
+    """
+    new_day = self.begin_move(curr_tile, curr_time)
+
+    # Main cognitive sequence begins here.
+    perceived = self.perceive(maze)
+    return self.continue_move(maze, personas, new_day, perceived)
+
+
   def open_convo_session(self, convo_mode): 
     open_convo_session(self, convo_mode)
 
@@ -5,7 +5,9 @@ File: gpt_structure.py
 Description: Wrapper functions for calling OpenAI APIs.
 """
 import json
+import queue
 import random
+import threading
 from openai import OpenAI
 import time
 
@@ -343,6 +345,102 @@ def safe_generate_response(prompt,
     return fail_safe_response
 
 
+class BatchEmbeddingClient:
+    """
+    Coalesces concurrent embedding requests into one API call. Callers
+    enqueue their text and block on a per-request event while a single
+    worker thread drains whatever is queued at that moment and issues one
+    embeddings request carrying all of the texts. A lone caller simply gets
+    a batch of one -- there is no artificial batching window -- but when
+    the personas perceive concurrently their texts ride the same request
+    and share its per-request overhead.
+    """
+
+    class _Request:
+        __slots__ = ["text", "model", "done", "embedding", "error"]
+
+        def __init__(self, text, model):
+            self.text = text
+            self.model = model
+            self.done = threading.Event()
+            self.embedding = None
+            self.error = None
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def _run(self):
+        while True:
+            requests = [self._queue.get()]
+            # Everything already waiting in the queue becomes the batch.
+            while True:
+                try:
+                    requests.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # Group by model; in practice there is only one.
+            by_model = dict()
+            for request in requests:
+                by_model.setdefault(request.model, []).append(request)
+            for model, batch in by_model.items():
+                self._embed_batch(model, batch)
+
+    def _embed_batch(self, model, batch):
+        start_time = time.time()
+        try:
+            if key_type == 'azure':
+                response = client.embeddings.create(
+                    api_base=openai_api_base,
+                    api_key=openai_api_key,
+                    api_type=openai_api_type,
+                    api_version=openai_api_version,
+                    input=[request.text for request in batch],
+                    engine=model)
+            else:
+                response = client.embeddings.create(
+                    input=[request.text for request in batch], model=model)
+        except Exception as e:
+            for request in batch:
+                request.error = e
+                request.done.set()
+            return
+
+        total_token = response.usage.total_tokens
+        time_use = time.time() - start_time
+        metrics.call_record(f"get_embedding[batch={len(batch)}]", model,
+                            total_token, time_use)
+
+        # A short response must fail the whole batch: zip would silently
+        # drop the unmatched requests and their callers would block forever
+        # on done.wait().
+        if len(response.data) != len(batch):
+            e = RuntimeError(
+                f"embedding batch returned {len(response.data)} results "
+                f"for {len(batch)} inputs")
+            for request in batch:
+                request.error = e
+                request.done.set()
+            return
+
+        data = sorted(response.data, key=lambda d: d.index)
+        for request, datum in zip(batch, data):
+            request.embedding = datum.embedding
+            request.done.set()
+
+    def embed(self, text, model):
+        request = self._Request(text, model)
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.embedding
+
+
+batch_embedding_client = BatchEmbeddingClient()
+
+
 def get_embedding(text, model="text-embedding-ada-002"):
     text = text.replace("\n", " ")
     if not text:
@@ -352,26 +450,9 @@ def get_embedding(text, model="text-embedding-ada-002"):
     if exist_embedding is not None:
         return exist_embedding
 
-    start_time = time.time()
-    if key_type == 'azure':
-        response = client.embeddings.create(
-            api_base=openai_api_base,
-            api_key=openai_api_key,
-            api_type=openai_api_type,
-            api_version=openai_api_version,
-            input=[text],
-            engine=model)
-    else:
-        response = client.embeddings.create(
-            input=[text], model=model)
-
-    function_name = get_caller_function_names()
-    total_token = response.usage.total_tokens
-    time_use = time.time() - start_time
-    metrics.call_record(function_name, model, total_token, time_use)
-
-    update_embedding_pool(text, response.data[0].embedding)
-    return response.data[0].embedding
+    embedding = batch_embedding_client.embed(text, model)
+    update_embedding_pool(text, embedding)
+    return embedding
 
 
 if __name__ == '__main__':
@@ -22,6 +22,7 @@ import json
 import numpy
 import datetime
 import pickle
+import threading
 import time
 import math
 import os
@@ -30,6 +31,13 @@ import traceback
 
 from selenium import webdriver
 
+try:
+  from watchdog.observers import Observer
+  from watchdog.events import FileSystemEventHandler
+except ImportError:
+  Observer = None
+  FileSystemEventHandler = object
+
 import utils
 from global_methods import *
 from utils import *
@@ -40,7 +48,46 @@ from metrics import metrics
 #                                  REVERIE                                   #
 ##############################################################################
 
-class ReverieServer: 
+class EnvDirWatcher(FileSystemEventHandler):
+  """
+  Watches the environment directory and sets a flag whenever the frontend
+  drops a new environment file, so start_server can sleep until woken
+  instead of polling the filesystem on a fixed interval. If watchdog is not
+  installed, wait() degrades to the original fixed-interval sleep.
+  """
+  def __init__(self, env_dir):
+    self.env_ready = threading.Event()
+    self.observer = None
+    if Observer is not None:
+      self.observer = Observer()
+      self.observer.schedule(self, env_dir)
+      self.observer.start()
+
+  def on_created(self, event):
+    self.env_ready.set()
+
+  def on_modified(self, event):
+    # The frontend writes the environment file non-atomically, so the
+    # create event can fire before the contents have landed. The modify
+    # events that follow re-wake the loop until the file parses.
+    self.env_ready.set()
+
+  def wait(self, timeout):
+    if self.observer is None:
+      time.sleep(timeout)
+      return
+    # The timeout keeps us robust against a notification that was delivered
+    # before we started waiting (or never delivered at all) -- the loop
+    # re-checks the environment file either way.
+    self.env_ready.wait(timeout)
+    self.env_ready.clear()
+
+  def stop(self):
+    if self.observer is not None:
+      self.observer.stop()
+
+
+class ReverieServer:
   def __init__(self, 
                fork_sim_code,
                sim_code):
@@ -305,14 +352,19 @@ class ReverieServer:
     # Later on, before this cycle ends, we need to return that to its 
     # initial state, like this: 
     # e.g., ('double studio[...]:bed', None, None, None)
-    # So we need to keep track of which event we added. 
-    # <game_obj_cleanup> is used for that. 
+    # So we need to keep track of which event we added.
+    # <game_obj_cleanup> is used for that.
     game_obj_cleanup = dict()
 
-    # The main while loop of Reverie. 
-    while (True): 
-      # Done with this iteration if <int_counter> reaches 0. 
-      if int_counter == 0: 
+    # <env_watcher> wakes us up as soon as the frontend writes the next
+    # environment file, instead of us discovering it on the next poll.
+    env_watcher = EnvDirWatcher(f"{sim_folder}/environment")
+
+    # The main while loop of Reverie.
+    while (True):
+      # Done with this iteration if <int_counter> reaches 0.
+      if int_counter == 0:
+        env_watcher.stop()
         break
 
       # <curr_env_file> file is the file that our frontend outputs. When the
@@ -323,14 +375,18 @@ class ReverieServer:
       if check_if_file_exists(curr_env_file):
         # If we have an environment file, it means we have a new perception
         # input to our personas. So we first retrieve it.
-        try: 
+        # <env_retrieved> must reset every iteration: the file may exist but
+        # still be mid-write, in which case we wait and retry this same step
+        # instead of reprocessing the previous step's environment.
+        env_retrieved = False
+        try:
           # Try and save block for robustness of the while loop.
           with open(curr_env_file) as json_file:
             new_env = json.load(json_file)
             env_retrieved = True
         except Exception as e:
           metrics.fail_record(e)
-      
+
         if env_retrieved: 
           # This is where we go through <game_obj_cleanup> to clean up all 
           # object actions that were used in this cylce. 
@@ -419,8 +475,9 @@ class ReverieServer:
 
           int_counter -= 1
           
-      # Sleep so we don't burn our machines. 
-      time.sleep(self.server_sleep)
+      # Rest until the frontend signals a new environment file (or the
+      # fallback poll interval elapses) so we don't burn our machines.
+      env_watcher.wait(self.server_sleep)
 
 
   def open_server(self): 
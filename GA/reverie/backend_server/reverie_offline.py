@@ -18,17 +18,26 @@ term "personas" to refer to generative agents, "associative memory" to refer
 to the memory stream, and "reverie" to refer to the overarching simulation 
 framework.
 """
+import asyncio
+import concurrent.futures
 import json
 import numpy
 import datetime
+import mmap
+import orjson
 import pickle
+import queue
+import threading
 import time
 import math
 import os
 import shutil
 import traceback
 
-from selenium import webdriver
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 import utils
 from global_methods import *
@@ -43,6 +52,154 @@ import argparse
 #                                  REVERIE                                   #
 ##############################################################################
 
+class CheckpointWriter:
+    """
+    Background writer for the per-step handoff files (movement and
+    environment json). The simulation loop submits (path, bytes) pairs and
+    moves on to the next tick while a single daemon thread does the actual
+    disk writes, so the many small per-step writes no longer block the hot
+    loop. A single worker keeps the writes in FIFO order, and each file is
+    written to a temp path and os.replace-d so a reader never sees a
+    half-written file.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def _run(self):
+        while True:
+            path, data = self._queue.get()
+            try:
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "wb") as outfile:
+                    outfile.write(data)
+                os.replace(tmp_path, path)
+            except Exception as e:
+                metrics.fail_record(e)
+            finally:
+                self._queue.task_done()
+
+    def submit(self, path, data):
+        # <data> is the already-serialized file content in bytes.
+        if isinstance(data, str):
+            data = data.encode()
+        self._queue.put((path, data))
+
+    def flush(self):
+        # Blocks until every submitted file has hit the disk.
+        self._queue.join()
+
+
+checkpoint_writer = CheckpointWriter()
+
+# Wire format for the per-step movement/environment handoff files. These
+# files are machine-to-machine plumbing, so "msgpack" packs them several
+# times faster and smaller than json; "json" keeps the output the
+# frontend can read. Like the other feature flags, this can be overridden
+# from utils.py.
+MOVEMENT_WIRE_FORMAT = getattr(utils, "MOVEMENT_WIRE_FORMAT", "json")
+if MOVEMENT_WIRE_FORMAT == "msgpack" and msgpack is None:
+    print("MOVEMENT_WIRE_FORMAT: msgpack is not installed, falling back to json")
+    MOVEMENT_WIRE_FORMAT = "json"
+
+# The per-step files are short-lived handoffs, so on Linux they live on a
+# RAM-backed tmpfs by default and are only mirrored into fs_storage when the
+# simulation is saved, avoiding a disk sync per step. Like the other feature
+# flags, fs_stepfile_root can be overridden from utils.py (set it to None to
+# write step files straight to fs_storage).
+fs_stepfile_root = getattr(
+    utils, "fs_stepfile_root",
+    "/dev/shm/reverie" if os.path.isdir("/dev/shm") else None)
+
+
+def pack_step_file(obj):
+    """
+    Serializes one per-step handoff dict according to MOVEMENT_WIRE_FORMAT.
+
+    INPUT
+      obj: the movements/environment dict for the current step.
+    OUTPUT
+      A (bytes, extension) pair ready to hand to the checkpoint writer.
+    """
+    if MOVEMENT_WIRE_FORMAT == "msgpack":
+        return msgpack.packb(obj, use_bin_type=True), "msgpack"
+    # Compact json: nobody reads these files by hand, so the indent
+    # formatter and its extra whitespace bytes buy nothing.
+    return orjson.dumps(obj), "json"
+
+
+def load_json_mmap(path):
+    """
+    Parses a json file through a read-only memory map, so orjson reads
+    straight from the kernel-mapped pages instead of first copying the whole
+    file into a Python buffer. For large environment files this roughly
+    halves the peak memory of a load.
+
+    INPUT
+      path: path of the json file to load.
+    OUTPUT
+      The parsed object.
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            # orjson takes a memoryview, letting it read the mapped pages
+            # without an intermediate bytes copy.
+            view = memoryview(mm)
+            try:
+                return orjson.loads(view)
+            finally:
+                view.release()
+        finally:
+            mm.close()
+
+
+class FrontendChannel:
+    """
+    Transport for the per-step environment handoff from the backend to the
+    frontend. <FileChannel> reproduces the original behavior of writing an
+    environment/{step} file for an external frontend to pick up, while
+    <InProcessChannel> keeps the latest environment dict in memory for
+    offline runs where no real frontend exists -- skipping the per-step
+    serialization and disk write entirely.
+    """
+
+    def publish(self, sim_code, step, environment):
+        raise NotImplementedError
+
+
+class FileChannel(FrontendChannel):
+    def publish(self, sim_code, step, environment):
+        env_bytes, env_ext = pack_step_file(environment)
+        checkpoint_writer.submit(
+            f"../../environment/frontend_server/storage/{sim_code}"
+            f"/environment/{step}.{env_ext}",
+            env_bytes)
+
+
+class InProcessChannel(FrontendChannel):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latest = None
+
+    def publish(self, sim_code, step, environment):
+        with self._lock:
+            self._latest = (step, environment)
+
+    def latest(self):
+        # Returns the most recently published (step, environment) pair, or
+        # None if nothing has been published yet.
+        with self._lock:
+            return self._latest
+
+
+# This is the offline server, so the environment handoff stays in memory by
+# default. Swap in FileChannel() to feed an external frontend.
+env_channel = InProcessChannel()
+
+
 class ReverieServer:
     def __init__(self,
                  fork_sim_code,
@@ -65,12 +222,19 @@ class ReverieServer:
         metrics.set_fold(sim_folder)
         utils.set_fold(sim_folder)
 
-        with open(f"{sim_folder}/reverie/meta.json") as json_file:
-            reverie_meta = json.load(json_file)
+        reverie_meta = load_json_mmap(f"{sim_folder}/reverie/meta.json")
 
-        with open(f"{sim_folder}/reverie/meta.json", "w") as outfile:
+        # The copied meta.json only needs rewriting if the fork pointer
+        # actually changed. The parsed dict stays on the instance so save()
+        # can update it in place instead of rebuilding it.
+        if reverie_meta.get("fork_sim_code") != fork_sim_code:
             reverie_meta["fork_sim_code"] = fork_sim_code
-            outfile.write(json.dumps(reverie_meta, indent=2))
+            # orjson returns bytes, so writing in binary mode skips the
+            # text-mode str->bytes encode.
+            with open(f"{sim_folder}/reverie/meta.json", "wb") as outfile:
+                outfile.write(orjson.dumps(reverie_meta,
+                                           option=orjson.OPT_INDENT_2))
+        self._reverie_meta = reverie_meta
 
         # LOADING REVERIE'S GLOBAL VARIABLES
         # The start datetime of the Reverie:
@@ -128,7 +292,7 @@ class ReverieServer:
 
         # Loading in all personas.
         init_env_file = f"{sim_folder}/environment/{str(self.step)}.json"
-        init_env = json.load(open(init_env_file))
+        init_env = load_json_mmap(init_env_file)
         for persona_name in reverie_meta['persona_names']:
             persona_folder = f"{sim_folder}/personas/{persona_name}"
             p_x = init_env[persona_name]["x"]
@@ -139,8 +303,17 @@ class ReverieServer:
             self.personas[persona_name] = curr_persona
             self.personas_tile[persona_name] = (p_x, p_y)
             frontend_pos[persona_name] = [p_x, p_y]
-            self.maze.tiles[p_y][p_x]["events"].add(curr_persona.scratch
-                                                    .get_curr_event_and_desc())
+            curr_event = curr_persona.scratch.get_curr_event_and_desc()
+            self.maze.tiles[p_y][p_x]["events"].add(curr_event)
+
+        # <step_root> is where the ephemeral per-step files are written
+        # during a run. When fs_stepfile_root points at a tmpfs this keeps
+        # the per-step writes off the disk entirely; save() mirrors the
+        # files into <sim_folder>.
+        if fs_stepfile_root:
+            self.step_root = f"{fs_stepfile_root}/{self.sim_code}"
+        else:
+            self.step_root = sim_folder
 
         # REVERIE SETTINGS PARAMETERS:
         # <server_sleep> denotes the amount of time that our while loop rests each
@@ -163,6 +336,9 @@ class ReverieServer:
         # with open(f"{fs_temp_storage}/curr_step.json", "w") as outfile:
         #     outfile.write(json.dumps(curr_step, indent=2))
 
+        # The command tables used by open_server's interactive prompt.
+        self._build_command_dispatch()
+
     def save(self):
         """
     Save all Reverie progress -- this includes Reverie's global state as well
@@ -177,8 +353,34 @@ class ReverieServer:
         # <sim_folder> points to the current simulation folder.
         sim_folder = f"{fs_storage}/{self.sim_code}"
 
-        # Save Reverie meta information.
-        reverie_meta = dict()
+        # Make sure every queued per-step file is on disk before we start
+        # writing the authoritative save state.
+        checkpoint_writer.flush()
+
+        # Mirror the ephemeral step files from the tmpfs root into the
+        # persistent simulation folder.
+        if self.step_root != sim_folder:
+            move_dir = f"{self.step_root}/movement"
+            if os.path.isdir(move_dir):
+                shutil.copytree(move_dir, f"{sim_folder}/movement",
+                                dirs_exist_ok=True)
+
+        # With the in-memory channel nothing ever writes environment/{step}
+        # files, but __init__ loads environment/{step}.json when a saved
+        # simulation is forked -- so persist the latest environment here.
+        if isinstance(env_channel, InProcessChannel):
+            latest = env_channel.latest()
+            if latest is not None:
+                latest_step, environment = latest
+                env_dir = f"{sim_folder}/environment"
+                os.makedirs(env_dir, exist_ok=True)
+                with open(f"{env_dir}/{latest_step}.json", "wb") as outfile:
+                    outfile.write(orjson.dumps(environment))
+
+        # Save Reverie meta information. <_reverie_meta> was parsed once at
+        # load time; refresh the fields that move during a run and write it
+        # back.
+        reverie_meta = self._reverie_meta
         reverie_meta["fork_sim_code"] = self.fork_sim_code
         reverie_meta["start_date"] = self.start_time.strftime("%B %d, %Y")
         reverie_meta["curr_time"] = self.curr_time.strftime("%B %d, %Y, %H:%M:%S")
@@ -187,13 +389,23 @@ class ReverieServer:
         reverie_meta["persona_names"] = list(self.personas.keys())
         reverie_meta["step"] = self.step
         reverie_meta_f = f"{sim_folder}/reverie/meta.json"
-        with open(reverie_meta_f, "w") as outfile:
-            outfile.write(json.dumps(reverie_meta, indent=2))
-
-        # Save the personas.
-        for persona_name, persona in self.personas.items():
-            save_folder = f"{sim_folder}/personas/{persona_name}/bootstrap_memory"
-            persona.save(save_folder)
+        with open(reverie_meta_f, "wb") as outfile:
+            outfile.write(orjson.dumps(reverie_meta,
+                                       option=orjson.OPT_INDENT_2))
+
+        # Save the personas. Each persona writes its own independent set of
+        # memory files, so the saves run in a thread pool and the checkpoint
+        # latency scales with the slowest persona instead of the sum of all
+        # of them.
+        def save_persona(item):
+            persona_name, persona = item
+            persona.save(f"{sim_folder}/personas/{persona_name}/bootstrap_memory")
+
+        # max(1, ...) keeps an empty persona dict a harmless no-op instead
+        # of a ValueError from max_workers=0.
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, min(8, len(self.personas)))) as executor:
+            list(executor.map(save_persona, self.personas.items()))
 
         metrics.save()
 
@@ -287,7 +499,7 @@ class ReverieServer:
 
             # time.sleep(self.server_sleep * 10)
 
-    def start_server(self, int_counter):
+    async def start_server(self, int_counter):
         """
     The main backend server of Reverie. 
     This function retrieves the environment file from the frontend to 
@@ -312,123 +524,344 @@ class ReverieServer:
         # So we need to keep track of which event we added.
         # <game_obj_cleanup> is used for that.
 
+        # The per-step output directories never change once the simulation is
+        # running, so create them once here instead of stat-ing them on every
+        # step of the loop below.
+        os.makedirs(f"{self.step_root}/movement", exist_ok=True)
+        if isinstance(env_channel, FileChannel):
+            os.makedirs(f"../../environment/frontend_server/storage/"
+                        f"{self.sim_code}/environment", exist_ok=True)
+
         # The main while loop of Reverie.
-        backend_data = {'time': self.curr_time.strftime("%B %d, %Y, %H:%M:%S"), 'persona': dict()}
-        for k, v in frontend_pos.items():
-            backend_data['persona'][k] = v
+        # One shallow copy of <frontend_pos> seeds the backend targets. Note
+        # that the two dicts must not alias: <frontend_pos> tracks the
+        # interpolated current positions while backend_data['persona'] holds
+        # the target tiles the personas are moving towards.
+        backend_data = {'time': self.curr_time.strftime("%B %d, %Y, %H:%M:%S"),
+                        'persona': dict(frontend_pos)}
         game_obj_cleanup = dict()
         while True:
             # Done with this iteration if <int_counter> reaches 0.
             if int_counter == 0:
+                checkpoint_writer.flush()
                 break
 
-            # <curr_env_file> file is the file that our frontend outputs. When the
-            # frontend has done its job and moved the personas, then it will put a
-            # new environment file that matches our step count. That's when we run
-            # the content of this for loop. Otherwise, we just wait.
-            curr_env_file = f"{sim_folder}/environment/{self.step}.json"
-
             frontend_data = sim_frontend(backend_data, self.step, self.sim_code)
 
             if frontend_data is not None:
-                if frontend_data is not None:
-                    # This is where we go through <game_obj_cleanup> to clean up all
-                    # object actions that were used in this cylce.
-                    for key, val in game_obj_cleanup.items():
-                        # We turn all object actions to their blank form (with None).
-                        self.maze.turn_event_from_tile_idle(key, val)
-                    # Then we initialize game_obj_cleanup for this cycle.
-                    game_obj_cleanup = dict()
-
-                    # We first move our personas in the backend environment to match
-                    # the frontend environment.
-                    for persona_name, persona in self.personas.items():
-                        # <curr_tile> is the tile that the persona was at previously.
-                        curr_tile = self.personas_tile[persona_name]
-                        # <new_tile> is the tile that the persona will move to right now,
-                        # during this cycle.
-                        new_tile = (frontend_data[persona_name]["x"],
-                                    frontend_data[persona_name]["y"])
-
-                        # We actually move the persona on the backend tile map here.
-                        self.personas_tile[persona_name] = new_tile
-                        self.maze.remove_subject_events_from_tile(persona.name, curr_tile)
-                        self.maze.add_event_from_tile(persona.scratch
-                                                      .get_curr_event_and_desc(), new_tile)
-
-                        # Now, the persona will travel to get to their destination. *Once*
-                        # the persona gets there, we activate the object action.
-                        if not persona.scratch.planned_path:
-                            # We add that new object action event to the backend tile map.
-                            # At its creation, it is stored in the persona's backend.
-                            game_obj_cleanup[persona.scratch
-                                .get_curr_obj_event_and_desc()] = new_tile
-                            self.maze.add_event_from_tile(persona.scratch
-                                                          .get_curr_obj_event_and_desc(), new_tile)
-                            # We also need to remove the temporary blank action for the
-                            # object that is currently taking the action.
-                            blank = (persona.scratch.get_curr_obj_event_and_desc()[0],
-                                     None, None, None)
-                            self.maze.remove_event_from_tile(blank, new_tile)
-
-                    # Then we need to actually have each of the personas perceive and
-                    # move. The movement for each of the personas comes in the form of
-                    # x y coordinates where the persona will move towards. e.g., (50, 34)
-                    # This is where the core brains of the personas are invoked.
-                    movements = {"persona": dict(),
-                                 "meta": dict()}
-                    for persona_name, persona in self.personas.items():
-                        # <next_tile> is a x,y coordinate. e.g., (58, 9)
-                        # <pronunciatio> is an emoji. e.g., "\ud83d\udca4"
-                        # <description> is a string description of the movement. e.g.,
-                        #   writing her next novel (editing her novel)
-                        #   @ double studio:double studio:common room:sofa
-                        next_tile, pronunciatio, description = persona.move(
-                            self.maze, self.personas, self.personas_tile[persona_name],
-                            self.curr_time)
-                        movements["persona"][persona_name] = {}
-                        movements["persona"][persona_name]["movement"] = next_tile
-                        backend_data["persona"][persona_name] = next_tile
-                        movements["persona"][persona_name]["pronunciatio"] = pronunciatio
-                        movements["persona"][persona_name]["description"] = description
-                        movements["persona"][persona_name]["chat"] = (persona
-                                                                      .scratch.chat)
-
-                    # Include the meta information about the current stage in the
-                    # movements dictionary.
-                    movements["meta"]["curr_time"] = (self.curr_time
-                                                      .strftime("%B %d, %Y, %H:%M:%S"))
-                    backend_data['time'] = movements["meta"]["curr_time"]
-                    # We then write the personas' movements to a file that will be sent
-                    # to the frontend server.
-                    # Example json output:
-                    # {"persona": {"Maria Lopez": {"movement": [58, 9]}},
-                    #  "persona": {"Klaus Mueller": {"movement": [38, 12]}},
-                    #  "meta": {curr_time: <datetime>}}
-                    curr_move_path = f"{sim_folder}/movement"
-                    # If the folder doesn't exist, we create it.
-                    if not os.path.exists(curr_move_path):
-                        os.makedirs(curr_move_path)
-                    curr_move_file = f"{sim_folder}/movement/{self.step}.json"
-                    with open(curr_move_file, "w") as outfile:
-                        outfile.write(json.dumps(movements, indent=2))
-
-                    # After this cycle, the world takes one step forward, and the
-                    # current time moves by <sec_per_step> amount.
-                    self.step += 1
-                    self.curr_time += datetime.timedelta(seconds=self.sec_per_step)
-
-                    int_counter -= 1
-
-            # Sleep so we don't burn our machines.
-            time.sleep(self.server_sleep)
+                # This is where we go through <game_obj_cleanup> to clean up all
+                # object actions that were used in this cylce.
+                for key, val in game_obj_cleanup.items():
+                    # We turn all object actions to their blank form (with None).
+                    self.maze.turn_event_from_tile_idle(key, val)
+                # Then we initialize game_obj_cleanup for this cycle.
+                game_obj_cleanup = dict()
+
+                # We first move our personas in the backend environment to match
+                # the frontend environment. All shared maze mutations happen
+                # in this synchronous phase, before the personas perceive.
+                # One snapshot of the persona items serves the sync,
+                # perceive, and move phases of this tick.
+                persona_items = list(self.personas.items())
+                new_days = dict()
+                for persona_name, persona in persona_items:
+                    # <curr_tile> is the tile that the persona was at previously.
+                    curr_tile = self.personas_tile[persona_name]
+                    # <new_tile> is the tile that the persona will move to right now,
+                    # during this cycle.
+                    new_tile = (frontend_data[persona_name]["x"],
+                                frontend_data[persona_name]["y"])
+
+                    # We actually move the persona on the backend tile map here.
+                    self.personas_tile[persona_name] = new_tile
+                    self.maze.remove_subject_events_from_tile(persona.name, curr_tile)
+                    self.maze.add_event_from_tile(persona.scratch
+                                                  .get_curr_event_and_desc(), new_tile)
+
+                    # Now, the persona will travel to get to their destination. *Once*
+                    # the persona gets there, we activate the object action.
+                    if not persona.scratch.planned_path:
+                        # We add that new object action event to the backend tile map.
+                        # At its creation, it is stored in the persona's backend.
+                        # The object event is the same for all three uses below,
+                        # so compute it once.
+                        obj_event = persona.scratch.get_curr_obj_event_and_desc()
+                        game_obj_cleanup[obj_event] = new_tile
+                        self.maze.add_event_from_tile(obj_event, new_tile)
+                        # We also need to remove the temporary blank action for the
+                        # object that is currently taking the action.
+                        blank = (obj_event[0], None, None, None)
+                        self.maze.remove_event_from_tile(blank, new_tile)
+
+                    # Sync the persona's scratch with its new tile and the
+                    # current time so that it is ready to perceive.
+                    new_days[persona_name] = persona.begin_move(
+                        new_tile, self.curr_time)
+
+                # Then we need to actually have each of the personas perceive and
+                # move. The movement for each of the personas comes in the form of
+                # x y coordinates where the persona will move towards. e.g., (50, 34)
+                # This is where the core brains of the personas are invoked.
+                # Perception is independent across personas and dominated by
+                # LLM round-trips, so we run it for all personas concurrently;
+                # the rest of the cognitive sequence may start conversations
+                # that touch other personas, so it stays sequential.
+                perceived_list = await asyncio.gather(
+                    *[asyncio.to_thread(persona.perceive, self.maze)
+                      for persona_name, persona in persona_items])
+                results = []
+                for (persona_name, persona), perceived in zip(
+                        persona_items, perceived_list):
+                    # <next_tile> is a x,y coordinate. e.g., (58, 9)
+                    # <pronunciatio> is an emoji. e.g., "\ud83d\udca4"
+                    # <description> is a string description of the movement. e.g.,
+                    #   writing her next novel (editing her novel)
+                    #   @ double studio:double studio:common room:sofa
+                    next_tile, pronunciatio, description = persona.continue_move(
+                        self.maze, self.personas, new_days[persona_name],
+                        perceived)
+                    results.append((persona_name, next_tile, pronunciatio,
+                                    description, persona.scratch.chat))
+                    backend_data["persona"][persona_name] = next_tile
+
+                # Assemble the movements for this step, including the meta
+                # information about the current stage.
+                curr_time_str = self.curr_time.strftime("%B %d, %Y, %H:%M:%S")
+                movements = {
+                    "persona": {name: {"movement": next_tile,
+                                       "pronunciatio": pronunciatio,
+                                       "description": description,
+                                       "chat": chat}
+                                for name, next_tile, pronunciatio,
+                                    description, chat in results},
+                    "meta": {"curr_time": curr_time_str}}
+                backend_data['time'] = curr_time_str
+                # We then write the personas' movements to a file that will be sent
+                # to the frontend server.
+                # Example json output:
+                # {"persona": {"Maria Lopez": {"movement": [58, 9]}},
+                #  "persona": {"Klaus Mueller": {"movement": [38, 12]}},
+                #  "meta": {curr_time: <datetime>}}
+                move_bytes, move_ext = pack_step_file(movements)
+                curr_move_file = f"{self.step_root}/movement/{self.step}.{move_ext}"
+                checkpoint_writer.submit(curr_move_file, move_bytes)
+
+                # After this cycle, the world takes one step forward, and the
+                # current time moves by <sec_per_step> amount.
+                self.step += 1
+                self.curr_time += datetime.timedelta(seconds=self.sec_per_step)
+
+                int_counter -= 1
+
+            # Sleep so we don't burn our machines. asyncio.sleep (rather than
+            # time.sleep) keeps the event loop free so background I/O can make
+            # progress while we rest.
+            await asyncio.sleep(self.server_sleep)
+
+    def _build_command_dispatch(self):
+        """
+    Builds the jump tables used by open_server. Commands without arguments
+    map from each accepted alias straight to a handler; parametrized
+    commands are matched by prefix, in order, against the lowercased input.
+
+    INPUT
+      None
+    OUTPUT
+      None
+    """
+        self._exact_commands = dict()
+        for aliases, handler in [
+                (("f", "fin", "finish", "save and finish"), self._cmd_finish),
+                (("start path tester mode",), self._cmd_path_tester),
+                (("exit",), self._cmd_exit),
+                (("save",), self._cmd_save)]:
+            for alias in aliases:
+                self._exact_commands[alias] = handler
+
+        self._prefix_commands = [
+            ("run", self._cmd_run),
+            ("print persona schedule", self._cmd_print_schedule),
+            ("print all persona schedule", self._cmd_print_all_schedules),
+            ("print hourly org persona schedule",
+             self._cmd_print_hourly_org_schedule),
+            ("print persona current tile", self._cmd_print_curr_tile),
+            ("print persona chatting with buffer",
+             self._cmd_print_chatting_buffer),
+            ("print persona associative memory (event)",
+             self._cmd_print_a_mem_events),
+            ("print persona associative memory (thought)",
+             self._cmd_print_a_mem_thoughts),
+            ("print persona associative memory (chat)",
+             self._cmd_print_a_mem_chats),
+            ("print persona spatial memory", self._cmd_print_s_mem),
+            ("print current time", self._cmd_print_curr_time),
+            ("print tile event", self._cmd_print_tile_event),
+            ("print tile details", self._cmd_print_tile_details),
+            ("call -- analysis", self._cmd_call_analysis),
+            ("call -- load history", self._cmd_call_load_history)]
+
+    # Each command handler takes the raw command string and returns the text
+    # to print, or None when the server loop should terminate.
+
+    def _cmd_finish(self, sim_command):
+        # Finishes the simulation environment and saves the progress.
+        # Example: fin
+        self.save()
+        return None
+
+    def _cmd_path_tester(self, sim_command):
+        # Starts the path tester and removes the currently forked sim files.
+        # Note that once you start this mode, you need to exit out of the
+        # session and restart in case you want to run something else.
+        shutil.rmtree(f"{fs_storage}/{self.sim_code}")
+        self.start_path_tester_server()
+        return ""
+
+    def _cmd_exit(self, sim_command):
+        # Finishes the simulation environment but does not save the progress
+        # and erases all saved data from current simulation.
+        # Example: exit
+        shutil.rmtree(f"{fs_storage}/{self.sim_code}")
+        return None
+
+    def _cmd_save(self, sim_command):
+        # Saves the current simulation progress.
+        # Example: save
+        self.save()
+        return ""
+
+    def _cmd_run(self, sim_command):
+        # Runs the number of steps specified in the prompt.
+        # Example: run 1000
+        int_count = int(sim_command.split()[-1])
+        asyncio.run(self.start_server(int_count))
+        return ""
+
+    def _cmd_print_schedule(self, sim_command):
+        # Print the decomposed schedule of the persona specified in the
+        # prompt.
+        # Example: print persona schedule Isabella Rodriguez
+        return (self.personas[" ".join(sim_command.split()[-2:])]
+                .scratch.get_str_daily_schedule_summary())
+
+    def _cmd_print_all_schedules(self, sim_command):
+        # Print the decomposed schedule of all personas in the world.
+        # Example: print all persona schedule
+        ret_str = ""
+        for persona_name, persona in self.personas.items():
+            ret_str += f"{persona_name}\n"
+            ret_str += f"{persona.scratch.get_str_daily_schedule_summary()}\n"
+            ret_str += f"---\n"
+        return ret_str
+
+    def _cmd_print_hourly_org_schedule(self, sim_command):
+        # Print the hourly schedule of the persona specified in the prompt.
+        # This one shows the original, non-decomposed version of the
+        # schedule.
+        # Ex: print hourly org persona schedule Isabella Rodriguez
+        return (self.personas[" ".join(sim_command.split()[-2:])]
+                .scratch.get_str_daily_schedule_hourly_org_summary())
+
+    def _cmd_print_curr_tile(self, sim_command):
+        # Print the x y tile coordinate of the persona specified in the
+        # prompt.
+        # Ex: print persona current tile Isabella Rodriguez
+        return str(self.personas[" ".join(sim_command.split()[-2:])]
+                   .scratch.curr_tile)
+
+    def _cmd_print_chatting_buffer(self, sim_command):
+        # Print the chatting with buffer of the persona specified in the
+        # prompt.
+        # Ex: print persona chatting with buffer Isabella Rodriguez
+        ret_str = ""
+        curr_persona = self.personas[" ".join(sim_command.split()[-2:])]
+        for p_n, count in curr_persona.scratch.chatting_with_buffer.items():
+            ret_str += f"{p_n}: {count}"
+        return ret_str
+
+    def _cmd_print_a_mem_events(self, sim_command):
+        # Print the associative memory (event) of the persona specified in
+        # the prompt
+        # Ex: print persona associative memory (event) Isabella Rodriguez
+        persona = self.personas[" ".join(sim_command.split()[-2:])]
+        return f'{persona}\n' + persona.a_mem.get_str_seq_events()
+
+    def _cmd_print_a_mem_thoughts(self, sim_command):
+        # Print the associative memory (thought) of the persona specified in
+        # the prompt
+        # Ex: print persona associative memory (thought) Isabella Rodriguez
+        persona = self.personas[" ".join(sim_command.split()[-2:])]
+        return f'{persona}\n' + persona.a_mem.get_str_seq_thoughts()
+
+    def _cmd_print_a_mem_chats(self, sim_command):
+        # Print the associative memory (chat) of the persona specified in
+        # the prompt
+        # Ex: print persona associative memory (chat) Isabella Rodriguez
+        persona = self.personas[" ".join(sim_command.split()[-2:])]
+        return f'{persona}\n' + persona.a_mem.get_str_seq_chats()
+
+    def _cmd_print_s_mem(self, sim_command):
+        # Print the spatial memory of the persona specified in the prompt
+        # Ex: print persona spatial memory Isabella Rodriguez
+        self.personas[" ".join(sim_command.split()[-2:])].s_mem.print_tree()
+        return ""
+
+    def _cmd_print_curr_time(self, sim_command):
+        # Print the current time of the world.
+        # Ex: print current time
+        ret_str = f'{self.curr_time.strftime("%B %d, %Y, %H:%M:%S")}\n'
+        ret_str += f'steps: {self.step}'
+        return ret_str
+
+    def _cmd_print_tile_event(self, sim_command):
+        # Print the tile events in the tile specified in the prompt
+        # Ex: print tile event 50, 30
+        ret_str = ""
+        cooordinate = [int(i.strip()) for i in sim_command[16:].split(",")]
+        for i in self.maze.access_tile(cooordinate)["events"]:
+            ret_str += f"{i}\n"
+        return ret_str
+
+    def _cmd_print_tile_details(self, sim_command):
+        # Print the tile details of the tile specified in the prompt
+        # Ex: print tile details 50, 30
+        ret_str = ""
+        cooordinate = [int(i.strip()) for i in sim_command[18:].split(",")]
+        for key, val in self.maze.access_tile(cooordinate).items():
+            ret_str += f"{key}: {val}\n"
+        return ret_str
+
+    def _cmd_call_analysis(self, sim_command):
+        # Starts a stateless chat session with the agent. It does not save
+        # anything to the agent's memory.
+        # Ex: call -- analysis Isabella Rodriguez
+        persona_name = sim_command[len("call -- analysis"):].strip()
+        self.personas[persona_name].open_convo_session("analysis")
+        return ""
+
+    def _cmd_call_load_history(self, sim_command):
+        # call -- load history the_ville/agent_history_init_n3.csv
+        curr_file = (maze_assets_loc + "/"
+                     + sim_command[len("call -- load history"):].strip())
+
+        rows = read_file_to_list(curr_file, header=True, strip_trail=True)[1]
+        clean_whispers = []
+        for row in rows:
+            agent_name = row[0].strip()
+            whispers = row[1].split(";")
+            whispers = [whisper.strip() for whisper in whispers]
+            for whisper in whispers:
+                clean_whispers += [[agent_name, whisper]]
+
+        load_history_via_whisper(self.personas, clean_whispers)
+        return ""
 
     def open_server(self):
         """
-    Open up an interactive terminal prompt that lets you run the simulation 
-    step by step and probe agent state. 
+    Open up an interactive terminal prompt that lets you run the simulation
+    step by step and probe agent state.
 
-    INPUT 
+    INPUT
       None
     OUTPUT
       None
@@ -438,168 +871,28 @@ class ReverieServer:
         print("clarify that these agents lack human-like agency, consciousness,")
         print("and independent decision-making.\n---")
 
-        # <sim_folder> points to the current simulation folder.
-        sim_folder = f"{fs_storage}/{self.sim_code}"
-
         while True:
             sim_command = input("Enter option: ")
             sim_command = sim_command.strip()
-            ret_str = ""
 
             try:
-                if sim_command.lower() in ["f", "fin", "finish", "save and finish"]:
-                    # Finishes the simulation environment and saves the progress.
-                    # Example: fin
-                    self.save()
-                    break
-
-                elif sim_command.lower() == "start path tester mode":
-                    # Starts the path tester and removes the currently forked sim files.
-                    # Note that once you start this mode, you need to exit out of the
-                    # session and restart in case you want to run something else.
-                    shutil.rmtree(sim_folder)
-                    self.start_path_tester_server()
-
-                elif sim_command.lower() == "exit":
-                    # Finishes the simulation environment but does not save the progress
-                    # and erases all saved data from current simulation.
-                    # Example: exit
-                    shutil.rmtree(sim_folder)
-                    break
-
-                elif sim_command.lower() == "save":
-                    # Saves the current simulation progress.
-                    # Example: save
-                    self.save()
-
-                elif sim_command[:3].lower() == "run":
-                    # Runs the number of steps specified in the prompt.
-                    # Example: run 1000
-                    int_count = int(sim_command.split()[-1])
-                    rs.start_server(int_count)
-
-                elif ("print persona schedule"
-                      in sim_command[:22].lower()):
-                    # Print the decomposed schedule of the persona specified in the
-                    # prompt.
-                    # Example: print persona schedule Isabella Rodriguez
-                    ret_str += (self.personas[" ".join(sim_command.split()[-2:])]
-                                .scratch.get_str_daily_schedule_summary())
-
-                elif ("print all persona schedule"
-                      in sim_command[:26].lower()):
-                    # Print the decomposed schedule of all personas in the world.
-                    # Example: print all persona schedule
-                    for persona_name, persona in self.personas.items():
-                        ret_str += f"{persona_name}\n"
-                        ret_str += f"{persona.scratch.get_str_daily_schedule_summary()}\n"
-                        ret_str += f"---\n"
-
-                elif ("print hourly org persona schedule"
-                      in sim_command.lower()):
-                    # Print the hourly schedule of the persona specified in the prompt.
-                    # This one shows the original, non-decomposed version of the
-                    # schedule.
-                    # Ex: print persona schedule Isabella Rodriguez
-                    ret_str += (self.personas[" ".join(sim_command.split()[-2:])]
-                                .scratch.get_str_daily_schedule_hourly_org_summary())
-
-                elif ("print persona current tile"
-                      in sim_command[:26].lower()):
-                    # Print the x y tile coordinate of the persona specified in the
-                    # prompt.
-                    # Ex: print persona current tile Isabella Rodriguez
-                    ret_str += str(self.personas[" ".join(sim_command.split()[-2:])]
-                                   .scratch.curr_tile)
-
-                elif ("print persona chatting with buffer"
-                      in sim_command.lower()):
-                    # Print the chatting with buffer of the persona specified in the
-                    # prompt.
-                    # Ex: print persona chatting with buffer Isabella Rodriguez
-                    curr_persona = self.personas[" ".join(sim_command.split()[-2:])]
-                    for p_n, count in curr_persona.scratch.chatting_with_buffer.items():
-                        ret_str += f"{p_n}: {count}"
-
-                elif ("print persona associative memory (event)"
-                      in sim_command.lower()):
-                    # Print the associative memory (event) of the persona specified in
-                    # the prompt
-                    # Ex: print persona associative memory (event) Isabella Rodriguez
-                    ret_str += f'{self.personas[" ".join(sim_command.split()[-2:])]}\n'
-                    ret_str += (self.personas[" ".join(sim_command.split()[-2:])]
-                                .a_mem.get_str_seq_events())
-
-                elif ("print persona associative memory (thought)"
-                      in sim_command.lower()):
-                    # Print the associative memory (thought) of the persona specified in
-                    # the prompt
-                    # Ex: print persona associative memory (thought) Isabella Rodriguez
-                    ret_str += f'{self.personas[" ".join(sim_command.split()[-2:])]}\n'
-                    ret_str += (self.personas[" ".join(sim_command.split()[-2:])]
-                                .a_mem.get_str_seq_thoughts())
-
-                elif ("print persona associative memory (chat)"
-                      in sim_command.lower()):
-                    # Print the associative memory (chat) of the persona specified in
-                    # the prompt
-                    # Ex: print persona associative memory (chat) Isabella Rodriguez
-                    ret_str += f'{self.personas[" ".join(sim_command.split()[-2:])]}\n'
-                    ret_str += (self.personas[" ".join(sim_command.split()[-2:])]
-                                .a_mem.get_str_seq_chats())
-
-                elif ("print persona spatial memory"
-                      in sim_command.lower()):
-                    # Print the spatial memory of the persona specified in the prompt
-                    # Ex: print persona spatial memory Isabella Rodriguez
-                    self.personas[" ".join(sim_command.split()[-2:])].s_mem.print_tree()
-
-                elif ("print current time"
-                      in sim_command[:18].lower()):
-                    # Print the current time of the world.
-                    # Ex: print current time
-                    ret_str += f'{self.curr_time.strftime("%B %d, %Y, %H:%M:%S")}\n'
-                    ret_str += f'steps: {self.step}'
-
-                elif ("print tile event"
-                      in sim_command[:16].lower()):
-                    # Print the tile events in the tile specified in the prompt
-                    # Ex: print tile event 50, 30
-                    cooordinate = [int(i.strip()) for i in sim_command[16:].split(",")]
-                    for i in self.maze.access_tile(cooordinate)["events"]:
-                        ret_str += f"{i}\n"
-
-                elif ("print tile details"
-                      in sim_command.lower()):
-                    # Print the tile details of the tile specified in the prompt
-                    # Ex: print tile event 50, 30
-                    cooordinate = [int(i.strip()) for i in sim_command[18:].split(",")]
-                    for key, val in self.maze.access_tile(cooordinate).items():
-                        ret_str += f"{key}: {val}\n"
-
-                elif ("call -- analysis"
-                      in sim_command.lower()):
-                    # Starts a stateless chat session with the agent. It does not save
-                    # anything to the agent's memory.
-                    # Ex: call -- analysis Isabella Rodriguez
-                    persona_name = sim_command[len("call -- analysis"):].strip()
-                    self.personas[persona_name].open_convo_session("analysis")
-
-                elif ("call -- load history"
-                      in sim_command.lower()):
-                    curr_file = maze_assets_loc + "/" + sim_command[len("call -- load history"):].strip()
-                    # call -- load history the_ville/agent_history_init_n3.csv
-
-                    rows = read_file_to_list(curr_file, header=True, strip_trail=True)[1]
-                    clean_whispers = []
-                    for row in rows:
-                        agent_name = row[0].strip()
-                        whispers = row[1].split(";")
-                        whispers = [whisper.strip() for whisper in whispers]
-                        for whisper in whispers:
-                            clean_whispers += [[agent_name, whisper]]
-
-                    load_history_via_whisper(self.personas, clean_whispers)
+                # Lowercase once, then look the command up: exact aliases hit
+                # the dict directly, parametrized commands fall through to an
+                # ordered prefix scan.
+                lowered = sim_command.lower()
+                handler = self._exact_commands.get(lowered)
+                if handler is None:
+                    for prefix, prefix_handler in self._prefix_commands:
+                        if lowered.startswith(prefix):
+                            handler = prefix_handler
+                            break
+
+                ret_str = ""
+                if handler is not None:
+                    ret_str = handler(sim_command)
+                    if ret_str is None:
+                        # Terminating commands (fin/exit) return None.
+                        break
 
                 print(ret_str)
 
@@ -636,19 +929,12 @@ def sim_frontend(backend_data, step, sim_code):
 
     step += 1
 
-    environment = dict()
-    for k, v in persona_dict.items():
-        environment[k] = {
-            'maze': 'the_ville',
-            'x': frontend_pos[k][0],
-            'y': frontend_pos[k][1],
-        }
-    data = dict()
-    data['step'] = step
-    data['sim_code'] = sim_code
-    data['environment'] = environment
-    with open(f"../../environment/frontend_server/storage/{sim_code}/environment/{step}.json", "w") as outfile:
-        outfile.write(json.dumps(environment, indent=2))
+    # <persona_dict> and <frontend_pos> share the same keys, so a single pass
+    # over <frontend_pos> builds the environment without a second dict lookup
+    # per persona.
+    environment = {name: {'maze': 'the_ville', 'x': pos[0], 'y': pos[1]}
+                   for name, pos in frontend_pos.items()}
+    env_channel.publish(sim_code, step, environment)
     return environment
 
 
@@ -700,5 +986,5 @@ if __name__ == '__main__':
     elif args.question is not None:
         rs_answer_question(args.target, rs, args.question)
     else:
-        rs.start_server(args.step)
+        asyncio.run(rs.start_server(args.step))
         rs.save()